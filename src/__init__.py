@@ -3,5 +3,6 @@ from .exceptions import *
 from .fields import *
 from .models import *
 from .repository import *
+from .responses import *
 from .service import *
 from .utils import *
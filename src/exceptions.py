@@ -1,17 +1,24 @@
-from typing import Literal
+from typing import Optional
 
-from fastapi import status
+from fastapi import Request, status
 from fastapi.exceptions import HTTPException
 
+from .responses import MongoJSONResponse
+
 
 class BaseHTTPException(Exception):
     """Base Exception for all errors"""
 
-    status_code: Literal
+    status_code: int = status.HTTP_500_INTERNAL_SERVER_ERROR
 
-    def __init__(self, message):
+    def __init__(self, message, status_code: Optional[int] = None):
         super().__init__(message)
         self.message = message
+        if status_code is not None:
+            self.status_code = status_code
+
+    def __str__(self):
+        return self.message
 
 
 class NotFoundException(BaseHTTPException):
@@ -21,13 +28,6 @@ class NotFoundException(BaseHTTPException):
 
     status_code = status.HTTP_404_NOT_FOUND
 
-    def __init__(self, message):
-        super().__init__(message)
-        self.message = message
-
-    def __str__(self):
-        return self.message
-
 
 class InternalServerException(BaseHTTPException):
     """
@@ -36,13 +36,6 @@ class InternalServerException(BaseHTTPException):
 
     status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
 
-    def __init__(self, message):
-        super().__init__(message)
-        self.message = message
-
-    def __str__(self):
-        return self.message
-
 
 class BadRequest(BaseHTTPException):
     """
@@ -51,13 +44,6 @@ class BadRequest(BaseHTTPException):
 
     status_code = status.HTTP_400_BAD_REQUEST
 
-    def __init__(self, message):
-        super().__init__(message)
-        self.message = message
-
-    def __str__(self):
-        return self.message
-
 
 class ForbiddenException(BaseHTTPException):
     """
@@ -66,24 +52,31 @@ class ForbiddenException(BaseHTTPException):
 
     status_code = status.HTTP_403_FORBIDDEN
 
-    def __init__(self, message):
-        super().__init__(message)
-        self.message = message
-
-    def __str__(self):
-        return self.message
-
 
-class UnauthorizedException(Exception):
+class UnauthorizedException(BaseHTTPException):
     """
     Exception for when a user is not authorized
     """
 
     status_code = status.HTTP_401_UNAUTHORIZED
 
-    def __init__(self, message):
-        super().__init__(message)
-        self.message = message
 
-    def __str__(self):
-        return self.message
+async def base_http_exception_handler(
+    request: Request, exc: BaseHTTPException
+) -> MongoJSONResponse:
+    """Translates a BaseHTTPException into a json error response.
+
+    Register with `app.add_exception_handler(BaseHTTPException,
+    base_http_exception_handler)` instead of an `@app.middleware("http")`
+    wrapper: exception handlers run in starlette's pure ASGI exception
+    middleware, while http middlewares go through BaseHTTPMiddleware,
+    which spawns an extra task per request.
+
+    Args:
+        request (Request): request that raised the exception
+        exc (BaseHTTPException): raised exception
+
+    Returns:
+        MongoJSONResponse: response carrying the message and status code
+    """
+    return MongoJSONResponse({"message": exc.message}, status_code=exc.status_code)
@@ -4,6 +4,9 @@ from bson import ObjectId
 class PyObjectId(ObjectId):
     """Custom ObjectId type"""
 
+    _is_valid = staticmethod(ObjectId.is_valid)
+    _ctor = ObjectId
+
     @classmethod
     def __get_validators__(cls):
         """Get validators for PyObjectId"""
@@ -12,9 +15,11 @@ class PyObjectId(ObjectId):
     @classmethod
     def validate(cls, v):
         """validate entered string is an ObjectId"""
-        if not ObjectId.is_valid(v):
+        if isinstance(v, ObjectId):
+            return v
+        if not cls._is_valid(v):
             raise ValueError("Invalid objectid")
-        return ObjectId(v)
+        return cls._ctor(v)
 
     @classmethod
     def __modify_schema__(cls, field_schema):
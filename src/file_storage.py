@@ -1,12 +1,38 @@
+import asyncio
 import io
-from typing import NoReturn, Optional, Type, Union
-
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    List,
+    NoReturn,
+    Optional,
+    Type,
+    Union,
+)
+
+import bson
 from bson import ObjectId
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
 from gridfs import errors as gridfs_errors
-from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket
+from motor.motor_asyncio import (
+    AsyncIOMotorDatabase,
+    AsyncIOMotorGridFSBucket,
+    AsyncIOMotorGridOut,
+)
 
 from .exceptions import NotFoundException
 
+CHUNK_SIZE_BYTES = 255 * 1024
+RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+
+
+async def _read_chunks(grid_out: AsyncIOMotorGridOut) -> AsyncIterator[bytes]:
+    """Yields the stored chunks of an opened file"""
+    while chunk := await grid_out.readchunk():
+        yield chunk
+
 
 class FileSystem:
     """Serves as a file system handler for storing files.
@@ -14,7 +40,9 @@ class FileSystem:
     """
 
     def __init__(self, database: AsyncIOMotorDatabase):
-        self.fs = AsyncIOMotorGridFSBucket(database)
+        self.fs = AsyncIOMotorGridFSBucket(database, chunk_size_bytes=CHUNK_SIZE_BYTES)
+        self.files = database["fs.files"]
+        self.chunks = database["fs.chunks"]
 
     async def upload(self, file_name: str, file_bytes: bytes) -> ObjectId:
         """Uploads file bytes to file system
@@ -26,8 +54,34 @@ class FileSystem:
         Returns:
             ObjectId: id of the stored file
         """
-        file_id = await self.fs.upload_from_stream(file_name, file_bytes)
-        return file_id
+
+        async def single_chunk() -> AsyncIterator[bytes]:
+            yield file_bytes
+
+        return await self.upload_stream(file_name, single_chunk())
+
+    async def upload_stream(
+        self, file_name: str, source: AsyncIterable[bytes]
+    ) -> ObjectId:
+        """Uploads file content to file system as it is produced, so the
+        whole file never has to be held in memory
+
+        Args:
+            file_name (str): title/name of the file be uploaded
+            source (AsyncIterable[bytes]): byte content of file, in pieces
+
+        Returns:
+            ObjectId: id of the stored file
+        """
+        grid_in = self.fs.open_upload_stream(file_name)
+        try:
+            async for data in source:
+                await grid_in.write(data)
+        except BaseException:
+            await grid_in.abort()
+            raise
+        await grid_in.close()
+        return grid_in._id
 
     async def download(self, file_id: ObjectId) -> io.BytesIO:
         """Retrieves content of a file and saves in io buffer
@@ -49,6 +103,76 @@ class FileSystem:
         except gridfs_errors.NoFile:
             raise NotFoundException("File not found")
 
+    async def download_many(
+        self, file_ids: Iterable[ObjectId], concurrency: int = 16
+    ) -> List[io.BytesIO]:
+        """Retrieves content of several files concurrently
+
+        Args:
+            file_ids (Iterable[ObjectId]): Ids of the files
+            concurrency (int): maximum number of downloads running at once
+
+        Raises:
+            NotFoundException: When any of the files is not found
+
+        Returns:
+            List[io.BytesIO]: retrieved file buffers, in the order of file_ids
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def download_one(file_id: ObjectId) -> io.BytesIO:
+            async with semaphore:
+                return await self.download(file_id)
+
+        return await asyncio.gather(*(download_one(i) for i in file_ids))
+
+    async def download_raw(self, file_id: ObjectId) -> io.BytesIO:
+        """Retrieves content of a file by reading its chunks as raw BSON
+        batches, skipping the per chunk document decoding of `download`
+
+        Args:
+            file_id (ObjectId): Id of the file
+
+        Raises:
+            NotFoundException: When no file is found
+
+        Returns:
+            io.BytesIO: retrieved file buffer of stored file
+        """
+        file_stream = io.BytesIO()
+        cursor = self.chunks.find_raw_batches(
+            {"files_id": file_id}, {"_id": 0, "data": 1}, sort=[("n", 1)]
+        )
+        async for batch in cursor:
+            for chunk in bson.decode_iter(batch, RAW_CODEC_OPTIONS):
+                file_stream.write(chunk["data"])
+        if not file_stream.tell():
+            if not await self.files.find_one({"_id": file_id}, {"_id": 1}):
+                raise NotFoundException("File not found")
+        file_stream.seek(0)
+        return file_stream
+
+    async def download_stream(self, file_id: ObjectId) -> AsyncIterator[bytes]:
+        """Opens a file to be read chunk by chunk without buffering the whole
+        file. The file is looked up before any chunk is read, so awaiting it
+        ahead of the response, e.g. `StreamingResponse(await
+        fs.download_stream(id))`, turns a missing file into a 404
+
+        Args:
+            file_id (ObjectId): Id of the file
+
+        Raises:
+            NotFoundException: When no file is found
+
+        Returns:
+            AsyncIterator[bytes]: stored chunks of the file
+        """
+        try:
+            grid_out = await self.fs.open_download_stream(file_id)
+        except gridfs_errors.NoFile:
+            raise NotFoundException("File not found")
+        return _read_chunks(grid_out)
+
     async def delete(self, file_id: ObjectId) -> None:
         """Deletes a file from the file system
 
@@ -1,3 +1,4 @@
+import time
 from datetime import datetime
 from enum import Enum
 from typing import Optional, Type, Union
@@ -7,16 +8,23 @@ from pydantic import BaseModel, Field, root_validator
 
 from .fields import PyObjectId
 
+_now = time.time
+
+
+class MongoModelConfig:
+    """Pydantic config shared by models holding mongo documents"""
+
+    allow_population_by_field_name = True
+    arbitrary_types_allowed = True
+    json_encoders = {ObjectId: str, datetime: datetime.isoformat}
+
 
 class DbModel(BaseModel):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime]
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str, datetime: lambda v: v.isoformat()}
+    Config = MongoModelConfig
 
 
 class PaginationModel(BaseModel):
@@ -26,25 +34,13 @@ class PaginationModel(BaseModel):
     size: int
     data: list[Type[BaseModel]]
 
-    @root_validator
+    @root_validator(skip_on_failure=True)
     def paginate(cls, values: dict):
         total_count = values["total_count"]
-        size = values["size"]
-        values["total_pages"] = (
-            0
-            if total_count == 0
-            else 1
-            if total_count <= size
-            else total_count // size
-            if (total_count % size) == 0
-            else (total_count // size) + 1
-        )
+        values["total_pages"] = -(-total_count // values["size"]) if total_count else 0
         return values
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str, datetime: lambda v: v.isoformat()}
+    Config = MongoModelConfig
 
 
 class ErrorModelStatus(str, Enum):
@@ -56,4 +52,4 @@ class ErrorModel(BaseModel):
     status: ErrorModelStatus
     message: str
     details: Union[str, list, dict]
-    timestamp: float = datetime.now().timestamp()
+    timestamp: float = Field(default_factory=_now)
@@ -1,80 +1,258 @@
-from typing import Any, Dict, List, Optional, Tuple, Type, Union
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, Union
 
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorCollection
+from pydantic import BaseModel, parse_obj_as
 from pymongo.collection import ReturnDocument
 
 from .models import DbModel
 
+# bson type aliases for field types, bool ahead of int as it subclasses it
+_BSON_TYPES: Tuple[Tuple[Tuple[type, ...], str], ...] = (
+    ((bool,), "bool"),
+    ((ObjectId,), "objectId"),
+    ((datetime,), "date"),
+    ((str,), "string"),
+    ((int, float, Decimal), "number"),
+)
+
+
+def _fast_build(cls: Type[BaseModel], doc: Dict[str, Any]) -> BaseModel:
+    """Builds a model instance from trusted data without running validators
+
+    Args:
+        cls (Type[BaseModel]): model class to build
+        doc (Dict[str, Any]): document as stored on database
+
+    Returns:
+        BaseModel: instance of cls holding the known keys of doc
+    """
+    field_map = cls.__dict__.get("_fast_build_fields")
+    if field_map is None:
+        field_map = {}
+        for name, field in cls.__fields__.items():
+            field_map[name] = field_map[field.alias] = name
+        setattr(cls, "_fast_build_fields", field_map)
+    return cls.construct(**{field_map[k]: v for k, v in doc.items() if k in field_map})
+
+
+def _merge_expression(base: str, update: Dict[str, Any]) -> Dict[str, Any]:
+    """Builds a `$mergeObjects` expression applying update onto the object
+    at base. Expression objects reject dotted field names, so keys such as
+    `address.city` are expanded into nested merges of their sub-objects
+
+    Args:
+        base (str): aggregation path of the object to update
+        update (Dict[str, Any]): values to set, keyed by field or dotted path
+
+    Returns:
+        Dict[str, Any]: aggregation expression of the updated object
+    """
+    changes: Dict[str, Any] = {}
+    nested: Dict[str, Dict[str, Any]] = {}
+    for key, value in update.items():
+        head, _, rest = key.partition(".")
+        if rest:
+            nested.setdefault(head, {})[rest] = value
+        else:
+            # wrapped in $literal so strings starting with "$" are not read
+            # as field paths by the pipeline
+            changes[key] = {"$literal": value}
+    for head, sub_update in nested.items():
+        changes[head] = _merge_expression(f"{base}.{head}", sub_update)
+    return {"$mergeObjects": [base, changes]}
+
 
 class BaseRepository:
     model_klass: Type[DbModel]
     collection_name: str
+    trust_db: bool = True
 
     def __init__(self, database):
-        self.collection: AsyncIOMotorCollection = database[self.collection_name]
+        # handles are cached on the database object itself, so they share its
+        # codec options, read preference and concerns, and are released with it
+        collections = vars(database).setdefault("_repository_collections", {})
+        collection = collections.get(self.collection_name)
+        if collection is None:
+            collection = collections.setdefault(
+                self.collection_name, database[self.collection_name]
+            )
+        self.collection: AsyncIOMotorCollection = collection
+
+    def _build(self, klass: Type[BaseModel], doc: Dict[str, Any]) -> BaseModel:
+        """Builds a model from a database document, skipping validation
+        unless `trust_db` is disabled on the repository
+        """
+        return _fast_build(klass, doc) if self.trust_db else klass(**doc)
+
+    def _build_many(
+        self, klass: Type[BaseModel], docs: List[Dict[str, Any]]
+    ) -> List[BaseModel]:
+        """Builds models from database documents, validating the whole batch
+        in a single call when `trust_db` is disabled on the repository
+        """
+        if self.trust_db:
+            return [_fast_build(klass, doc) for doc in docs]
+        return parse_obj_as(List[klass], docs)  # type: ignore
 
     async def list(
-        self, size: Optional[int], page: Optional[int], **filter_kwargs
+        self,
+        size: Optional[int],
+        page: Optional[int],
+        projection: Optional[Dict[str, Any]] = None,
+        **filter_kwargs,
     ) -> tuple[int, list[DbModel]]:
         """Produces a list of entities of model class
 
         Args:
             size [int]: optional size used to paginate results from database
             page [int]: optional page used to denote page number to limit results from database
+            projection [dict]: optional projection limiting the fields read from database
             filter_kwargs [dict]: keyword values used to search for entities on database
 
         Returns:
             tuple[int, list[DbModel]: tuple of total results and paginated count
         """
-        db_results = self.collection.find(filter_kwargs)
-        total_count = await self.collection.count_documents(filter_kwargs)
-        if size and page:
-            if page == 1:
-                db_results = await db_results.limit(size).to_list(length=size)
-            else:
-                db_results = (
-                    await db_results.skip(size * page).limit(size).to_list(length=size)
-                )
-        objects = [self.model_klass(**result) for result in db_results]
+        if not (size and page):
+            db_results = await self.collection.find(
+                filter_kwargs, projection=projection
+            ).to_list(length=None)
+            total_count = len(db_results)
+        else:
+            # the page and its count are separate queries, as a single
+            # $facet document would cap pages at the 16MB bson size limit
+            total_count, db_results = await asyncio.gather(
+                self.count(**filter_kwargs),
+                self.collection.find(
+                    filter_kwargs,
+                    projection=projection,
+                    skip=size * (page - 1),
+                    limit=size,
+                    batch_size=size,
+                ).to_list(length=size),
+            )
+        objects = self._build_many(self.model_klass, db_results)
         return total_count, objects
 
-    async def get(self, id_: ObjectId) -> Optional[DbModel]:
+    async def get(
+        self, id_: ObjectId, projection: Optional[Dict[str, Any]] = None
+    ) -> Optional[DbModel]:
         """Retrieves a single entity from database
 
         Args:
             id_ [ObjectId]: id of collection record to fetch
+            projection [dict]: optional projection limiting the fields read from database
 
         Returns:
             entity[model_klass]: instance of model klass being queried
             None: When No record is found
         """
-        db_result = await self.collection.find_one({"_id": id_})
+        db_result = await self.collection.find_one({"_id": id_}, projection=projection)
         if db_result:
-            return self.model_klass(**db_result)
+            return self._build(self.model_klass, db_result)
         return None
 
-    async def search(self, many: bool = False, **filter_kwargs):
+    async def search(
+        self, many: bool = False, max_items: Optional[int] = None, **filter_kwargs
+    ):
         """Searches for item that match filtered property
 
         Args:
             many [bool]: boolean to indicate result for many or single
+            max_items [int]: optional cap on the number of results when many is set
             filter_kwargs [dict]: keyword values of fieds for filtering
         """
-        result_count = self.collection.count_documents(filter_kwargs)
         db_result: Union[dict, list] = (
             await self.collection.find_one(filter_kwargs)
             if not many
-            else await self.collection.find(filter_kwargs).to_list(result_count)
+            else await self.collection.find(filter_kwargs).to_list(max_items)
         )
         if db_result:
             return (
-                self.model_klass(**db_result)
+                self._build(self.model_klass, db_result)
                 if not many
-                else [self.model_klass(**result) for result in db_result]
+                else self._build_many(self.model_klass, db_result)
             )
         return None
 
+    async def search_one(
+        self, filter_: Dict[str, Any], projection: Optional[Dict[str, Any]] = None
+    ) -> Optional[DbModel]:
+        """Searches for the first entity matching the filter
+
+        Args:
+            filter_ (Dict[str, Any]): values of fields used for filtering
+            projection (Optional[Dict[str, Any]]): optional projection limiting
+                the fields read from database
+
+        Returns:
+            entity[model_klass]: instance of model klass found
+            None: When No record is found
+        """
+        db_result = await self.collection.find_one(filter_, projection=projection)
+        if db_result:
+            return self._build(self.model_klass, db_result)
+        return None
+
+    async def search_any(
+        self,
+        fields: Dict[str, Any],
+        limit: int = 1,
+        exclude_id: Optional[ObjectId] = None,
+    ) -> List[ObjectId]:
+        """Searches for entities matching any of the given field values
+        with a single `$or` query
+
+        Args:
+            fields (Dict[str, Any]): field values of which any one may match
+            limit (int): maximum number of matches to return
+            exclude_id (Optional[ObjectId]): id of an entity to leave out of the matches
+
+        Returns:
+            List[ObjectId]: ids of the matching entities
+        """
+        if not fields:
+            return []
+        filter_: Dict[str, Any] = {
+            "$or": [{key: value} for key, value in fields.items()]
+        }
+        if exclude_id is not None:
+            filter_["_id"] = {"$ne": exclude_id}
+        cursor = self.collection.find(filter_, projection={"_id": 1}, limit=limit)
+        return [doc["_id"] for doc in await cursor.to_list(length=limit)]
+
+    async def ensure_unique_indexes(self, fields: Sequence[str]) -> None:
+        """Creates a unique index on each of the given fields. Indexes are
+        partial so documents missing a field, or holding None in it, do not
+        conflict with each other
+
+        Args:
+            fields (Sequence[str]): names of the fields that must be unique
+        """
+        for field in fields:
+            await self.collection.create_index(
+                field,
+                unique=True,
+                partialFilterExpression={field: self._present_filter(field)},
+            )
+
+    def _present_filter(self, field: str) -> Dict[str, Any]:
+        """Builds the partial index condition matching documents that hold
+        a value for field. `$type` is used as partial indexes accept neither
+        `$ne` nor `$not`; fields of unknown type fall back to `$exists`,
+        which still indexes None values
+        """
+        model_field = self.model_klass.__fields__.get(field)
+        type_ = getattr(model_field, "type_", None)
+        if isinstance(type_, type):
+            for klasses, alias in _BSON_TYPES:
+                if issubclass(type_, klasses):
+                    return {"$type": alias}
+        return {"$exists": True}
+
     async def count(self, **filter_kwargs) -> int:
         """Gets the count of queried entities
 
@@ -84,6 +262,8 @@ class BaseRepository:
         Returns:
             int: count of entities found
         """
+        if not filter_kwargs:
+            return await self.collection.estimated_document_count()
         return await self.collection.count_documents(filter_kwargs)
 
     async def create(self, model_instance: DbModel):
@@ -96,11 +276,10 @@ class BaseRepository:
         Returns:
             model_instance[model_klass]: Model Instance being added
         """
-        db_insert = await self.collection.insert_one(
-            model_instance.dict(exclude={"id"})
-        )
-        db_result = await self.get(db_insert.inserted_id)
-        return db_result
+        data = model_instance.dict(exclude={"id"})
+        db_insert = await self.collection.insert_one(data)
+        data["_id"] = db_insert.inserted_id
+        return self._build(self.model_klass, data)
 
     async def update(self, id_: ObjectId, model_instance: DbModel):
         """
@@ -113,11 +292,44 @@ class BaseRepository:
         Returns:
             model_instance[model_klass]: Update Model Instance
         """
-        await self.collection.update_one(
-            {"_id": id_}, {"$set": model_instance.dict(exclude={"id"})}
+        db_result = await self.collection.find_one_and_update(
+            {"_id": id_},
+            {"$set": model_instance.dict(exclude={"id"})},
+            return_document=ReturnDocument.AFTER,
+        )
+        if db_result:
+            return self._build(self.model_klass, db_result)
+        return None
+
+    async def update_and_return(
+        self,
+        id_: ObjectId,
+        set_dict: Dict[str, Any],
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> Optional[DbModel]:
+        """Sets the given fields on an entity in a single round trip
+
+        Args:
+            id_ (ObjectId): id of the entity to update
+            set_dict (Dict[str, Any]): values of the fields to set
+            projection (Optional[Dict[str, Any]]): optional projection limiting
+                the fields read back from database
+
+        Returns:
+            entity[model_klass]: entity as stored after the update
+            None: When No record is found
+        """
+        if not set_dict:
+            return await self.get(id_, projection=projection)
+        db_result = await self.collection.find_one_and_update(
+            {"_id": id_},
+            {"$set": set_dict},
+            projection=projection,
+            return_document=ReturnDocument.AFTER,
         )
-        db_result = await self.get(id_)
-        return db_result
+        if db_result:
+            return self._build(self.model_klass, db_result)
+        return None
 
     async def delete(self, id_: ObjectId) -> bool:
         """Deletes Entity from database
@@ -172,7 +384,7 @@ class BaseRepository:
             return []
 
         nested_docs = result[field]
-        nested_docs = [nested_model_class(**doc) for doc in nested_docs]
+        nested_docs = self._build_many(nested_model_class, nested_docs)
         return nested_docs
 
     async def nested_count(self, main_doc_id: ObjectId, field: str) -> int:
@@ -271,7 +483,7 @@ class BaseRepository:
 
         nested_doc = doc[field]
         nested_doc = nested_doc[0]
-        nested_doc = nested_model_class(**nested_doc)
+        nested_doc = self._build(nested_model_class, nested_doc)
         return nested_doc
 
     async def nested_update(
@@ -302,7 +514,22 @@ class BaseRepository:
         filter_ = filter_ or {}
         filter_ = {"_id": main_doc_id, **filter_, f"{field}._id": nested_doc_id}
 
-        update_query = {"$set": {f"{field}.$.{k}": v for k, v in update.items()}}
+        merged_item = {
+            "$cond": [
+                {"$eq": ["$$item._id", nested_doc_id]},
+                _merge_expression("$$item", update),
+                "$$item",
+            ]
+        }
+        update_query = [
+            {
+                "$set": {
+                    field: {
+                        "$map": {"input": f"${field}", "as": "item", "in": merged_item}
+                    }
+                }
+            }
+        ]
 
         options = {
             "return_document": ReturnDocument.AFTER,
@@ -322,7 +549,7 @@ class BaseRepository:
         if nested_doc is None:
             return None
 
-        return nested_model_class(**nested_doc)
+        return self._build(nested_model_class, nested_doc)
 
     async def nested_remove(
         self,
@@ -0,0 +1,38 @@
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+# datetimes are left in isoformat without an added zone, matching the
+# pydantic json encoder used by response_model routes
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def orjson_default(obj: Any) -> Any:
+    """Serializes types orjson does not handle natively
+
+    Args:
+        obj (Any): object orjson could not serialize
+
+    Raises:
+        TypeError: when the type is not supported
+
+    Returns:
+        Any: json serializable representation of obj
+    """
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.dict(by_alias=True)
+    raise TypeError(f"Type {type(obj).__name__} is not JSON serializable")
+
+
+class MongoJSONResponse(ORJSONResponse):
+    """JSON response rendered with orjson, aware of mongo ObjectIds.
+    Register with `FastAPI(default_response_class=MongoJSONResponse)`
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=orjson_default, option=ORJSON_OPTIONS)
@@ -1,12 +1,54 @@
-from typing import List, Optional, Type, Union
+import asyncio
+from typing import Any, ClassVar, Dict, List, Optional, Tuple, Type, Union
+from weakref import WeakKeyDictionary
 
+import orjson
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+from pymongo.errors import DuplicateKeyError, OperationFailure
 
 from .exceptions import BadRequest, NotFoundException
 from .models import DbModel
-from .repository import BaseRepository
+from .repository import BaseRepository, _fast_build
+from .responses import ORJSON_OPTIONS, orjson_default
+
+
+def _duplicate_fields(error: DuplicateKeyError) -> str:
+    """Names the fields of the unique index a write conflicted on"""
+    return ", ".join((error.details or {}).get("keyPattern", {}))
+
+
+def _validate_fields(cls: Type[BaseModel], data: Dict[str, Any]) -> Dict[str, Any]:
+    """Validates the given values against the matching fields of a model,
+    coercing them to the types stored on database (e.g. str ids to
+    ObjectIds) without requiring the fields that are left out
+
+    Args:
+        cls (Type[BaseModel]): model holding the fields
+        data (Dict[str, Any]): values keyed by field name
+
+    Returns:
+        Dict[str, Any]: validated values
+
+    Raises:
+        ValidationError: when a value is invalid for its field
+    """
+    values: Dict[str, Any] = {}
+    errors = []
+    for name, value in data.items():
+        field = cls.__fields__.get(name)
+        if field is None:
+            values[name] = value
+            continue
+        value, error = field.validate(value, values, loc=name, cls=cls)
+        if error:
+            errors.append(error)
+        else:
+            values[name] = value
+    if errors:
+        raise ValidationError(errors, cls)
+    return values
 
 
 class BaseService:
@@ -15,11 +57,86 @@ class BaseService:
     data_response_klass: Type[BaseModel]
     model_klass: Type[DbModel]
     unique_fields: list[str]
+    shared_schema: bool = True
+    _unique_keys: Tuple[str, ...] = ()
+    _create_unique_keys: Tuple[str, ...] = ()
+    _index_checks: ClassVar[
+        "WeakKeyDictionary[Any, Dict[Tuple[type, str], asyncio.Future]]"
+    ] = WeakKeyDictionary()
+    _response_fields: Tuple[Tuple[str, str], ...] = ()
+    _projection: Optional[Dict[str, int]] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._unique_keys = tuple(getattr(cls, "unique_fields", None) or ())
+        request_klass = getattr(cls, "data_request_klass", None)
+        cls._create_unique_keys = tuple(
+            key
+            for key in cls._unique_keys
+            if request_klass is not None and key in request_klass.__fields__
+        )
+        response_klass = getattr(cls, "data_response_klass", None)
+        if response_klass is not None:
+            cls._response_fields = tuple(
+                (name, field.alias) for name, field in response_klass.__fields__.items()
+            )
+            # reads are only narrowed when the repository builds entities
+            # without validation, as missing required fields would fail it
+            repository_klass = getattr(cls, "repository_klass", None)
+            cls._projection = (
+                {field.alias: 1 for field in response_klass.__fields__.values()}
+                if getattr(repository_klass, "trust_db", False)
+                else None
+            )
 
     def __init__(self, database: AsyncIOMotorDatabase):
         self.database = database
         self.repository = self.repository_klass(database)
 
+    async def ensure_indexes(self) -> bool:
+        """Creates a unique index for each of the unique fields, once per
+        service class and database. Best awaited on application startup, as
+        the first write otherwise waits for the index builds. The outcome is
+        kept for the life of the client, so a failure, e.g. from duplicates
+        already stored or a conflicting existing index, is not retried on
+        every write; unique fields are checked with a query instead
+
+        Returns:
+            bool: True when the indexes exist
+        """
+        if not self._unique_keys:
+            return True
+        checks = self._index_checks.setdefault(self.database.client, {})
+        key = (type(self), self.database.name)
+        # concurrent first writes wait for the build already running
+        while key in checks:
+            check = checks[key]
+            if check.done():
+                return check.result()
+            await asyncio.wait([check])
+        check = checks[key] = asyncio.get_running_loop().create_future()
+        try:
+            await self.repository.ensure_unique_indexes(self._unique_keys)
+        except OperationFailure:
+            check.set_result(False)
+            return False
+        except BaseException:
+            # transient errors, e.g. a lost connection, are left to a later call
+            del checks[key]
+            check.set_result(None)
+            raise
+        check.set_result(True)
+        return True
+
+    def _to_response(self, db_result: DbModel) -> BaseModel:
+        """Builds a response object from an entity read from database,
+        without validating its already validated fields again unless
+        `shared_schema` is disabled on the service
+        """
+        if self.shared_schema:
+            return _fast_build(self.data_response_klass, db_result.__dict__)
+        return self.data_response_klass(**db_result.dict())
+
     async def list(
         self, size: Optional[int], page: Optional[int], **filter_kwargs
     ) -> tuple[int, list[BaseModel]]:
@@ -34,11 +151,52 @@ class BaseService:
             tuple[int, list[BaseModel]: tuple of total results and paginated count
         """
         total_count, db_results = await self.repository.list(
-            size=size, page=page, **filter_kwargs
+            size=size,
+            page=page,
+            projection=self._projection,
+            **filter_kwargs,
         )
-        responses = [self.data_response_klass(**result.dict()) for result in db_results]
+        responses = [self._to_response(result) for result in db_results]
         return total_count, responses
 
+    async def list_json(
+        self, size: Optional[int], page: Optional[int], **filter_kwargs
+    ) -> bytes:
+        """List all entities serialized straight to json, to be returned as
+        `Response(content=..., media_type="application/json")` so FastAPI
+        skips its jsonable_encoder pass
+
+        Args:
+            size [int]: optional size used to paginate results from database
+            page [int]: optional page used to denote page number to limit results from database
+            filter_kwargs [dict]: keyword values used to search for entities on database
+
+        Returns:
+            bytes: json object holding total_count and the paginated data
+        """
+        total_count, db_results = await self.repository.list(
+            size=size,
+            page=page,
+            projection=self._projection,
+            **filter_kwargs,
+        )
+        # rows are keyed by alias, as a response_model route would render them
+        if self.shared_schema:
+            data = [
+                {
+                    alias: result.__dict__[name]
+                    for name, alias in self._response_fields
+                    if name in result.__dict__
+                }
+                for result in db_results
+            ]
+        else:
+            data = [
+                self._to_response(result).dict(by_alias=True) for result in db_results
+            ]
+        payload = {"total_count": total_count, "data": data}
+        return orjson.dumps(payload, default=orjson_default, option=ORJSON_OPTIONS)
+
     async def get(self, id_: ObjectId) -> BaseModel:
         """Get a particular entity
 
@@ -51,12 +209,29 @@ class BaseService:
         Raises:
             NotFoundException: when no entity with primary key is found
         """
-        db_result = await self.repository.get(id_)
+        db_result = await self.repository.get(id_, projection=self._projection)
         if db_result is None:
-            raise NotFoundException(f"Object with id {id} does not exist")
-        response = self.data_response_klass(**db_result.dict())
+            raise NotFoundException(f"Object with id {id_} does not exist")
+        response = self._to_response(db_result)
         return response
 
+    async def get_json(self, id_: ObjectId) -> bytes:
+        """Get a particular entity serialized straight to json
+
+        Args:
+            id_ [ObjectId]: primary key of entity
+
+        Returns:
+            bytes: json object of entity from database
+
+        Raises:
+            NotFoundException: when no entity with primary key is found
+        """
+        response = await self.get(id_)
+        return orjson.dumps(
+            response.dict(by_alias=True), default=orjson_default, option=ORJSON_OPTIONS
+        )
+
     async def search(
         self, many: bool = False, **filter_kwargs
     ) -> Union[BaseModel, List[BaseModel]]:
@@ -72,13 +247,19 @@ class BaseService:
         Raises:
             NotFoundException: when no result is found
         """
-        db_result = await self.repository.search(many=many, **filter_kwargs)
+        db_result = (
+            await self.repository.search(many=True, **filter_kwargs)
+            if many
+            else await self.repository.search_one(
+                filter_kwargs, projection=self._projection
+            )
+        )
         if db_result is None:
             raise NotFoundException(f"Objects matching filters not found")
         response = (
-            self.data_response_klass(**db_result.dict())
+            self._to_response(db_result)
             if not many
-            else [self.data_response_klass(**result.dict()) for result in db_result]
+            else [self._to_response(result) for result in db_result]
         )
         return response
 
@@ -106,19 +287,28 @@ class BaseService:
         Raises:
             BadRequest: When unique data already exists
         """
-        db_model_instance = self.model_klass(**request_instance.dict())
-        if self.unique_fields:
+        request_data = request_instance.__dict__
+        if not await self.ensure_indexes():
             filter_kwargs = {
-                key: getattr(request_instance, key)
-                for key in self.unique_fields
-                if hasattr(request_instance, key) and key is not None
+                key: request_data[key]
+                for key in self._create_unique_keys
+                if request_data[key] is not None
             }
-            if await self.repository.search(**filter_kwargs):
+            if await self.repository.search_any(filter_kwargs):
                 raise BadRequest(
                     "Cannot create data contains already exsiting unique properties"
                 )
-        db_result = await self.repository.create(db_model_instance)
-        response = self.data_response_klass(**db_result.dict())
+        # client input is always validated against the entity, as
+        # `shared_schema` only covers data read back from database
+        db_model_instance = self.model_klass(**request_instance.dict())
+        try:
+            db_result = await self.repository.create(db_model_instance)
+        except DuplicateKeyError as e:
+            raise BadRequest(
+                "Cannot create data contains already exsiting unique properties: "
+                + _duplicate_fields(e)
+            )
+        response = self._to_response(db_result)
         return response
 
     async def update(self, id_: ObjectId, update_instance: BaseModel) -> BaseModel:
@@ -133,23 +323,32 @@ class BaseService:
 
         Raises:
             BadRequest: when unique data already exists in database
+            NotFoundException: when no entity with primary key is found
         """
-        if not await self.repository.get(id_):
+        update_data = _validate_fields(
+            self.model_klass,
+            update_instance.dict(exclude_unset=True, exclude={"id"}),
+        )
+        await self.ensure_indexes()
+        filter_kwargs = {
+            key: update_data[key]
+            for key in self._unique_keys
+            if update_data.get(key) is not None
+        }
+        if await self.repository.search_any(filter_kwargs, exclude_id=id_):
+            raise BadRequest("Cannot update data due to exisiting unique properties")
+        try:
+            db_result = await self.repository.update_and_return(
+                id_, update_data, projection=self._projection
+            )
+        except DuplicateKeyError as e:
+            raise BadRequest(
+                "Cannot update data due to exisiting unique properties: "
+                + _duplicate_fields(e)
+            )
+        if db_result is None:
             raise NotFoundException(f"Object with id {id_} is not found")
-        if self.unique_fields:
-            filter_kwargs = {
-                key: getattr(update_instance, key)
-                for key in self.unique_fields
-                if hasattr(update_instance, key)
-            }
-            searched_object = await self.repository.search(**filter_kwargs)
-            if not (searched_object and searched_object.id == id_):
-                raise BadRequest(
-                    "Cannot update data due to exisiting unique properties"
-                )
-        update_instance = self.model_klass(**update_instance.dict(exclude_unset=True))
-        db_result = await self.repository.update(id_, update_instance)
-        response = self.data_response_klass(**db_result.dict())
+        response = self._to_response(db_result)
         return response
 
     async def delete(self, id_: ObjectId):
@@ -157,7 +356,9 @@ class BaseService:
 
         Args:
             id_[ObjectId]: primary key of entity to be removed
+
+        Raises:
+            NotFoundException: when no entity with primary key is found
         """
-        if not await self.repository.get(id_):
+        if not await self.repository.delete(id_):
             raise NotFoundException(f"Object with id {id_} is not found")
-        await self.delete(id_)
@@ -1,14 +1,44 @@
 import secrets
+import threading
+import time
 from datetime import datetime, timedelta
+from hashlib import sha256
 
-from jose import JWTError, jwt
+import anyio
+import jwt
+from cachetools import TTLCache
+from jwt import PyJWTError as JWTError
 from passlib.context import CryptContext
 
 from src.config import settings
 from src.libs import exceptions
 
 settings_lib = settings.Settings()
-pwd_context = CryptContext(schemes=[settings_lib.hash_scheme], deprecated="auto")
+# hashing costs used when the settings leave them out
+ARGON2_TIME_COST = 2
+ARGON2_MEMORY_COST = 65536
+ARGON2_PARALLELISM = 1
+BCRYPT_ROUNDS = 12
+
+# the configured scheme stays listed so its existing hashes still verify,
+# and are upgraded to argon2 through `hash_needs_update`
+pwd_context = CryptContext(
+    schemes=list(dict.fromkeys(["argon2", settings_lib.hash_scheme])),
+    deprecated="auto",
+    argon2__time_cost=getattr(settings_lib, "argon2_time_cost", ARGON2_TIME_COST),
+    argon2__memory_cost=getattr(settings_lib, "argon2_memory_cost", ARGON2_MEMORY_COST),
+    argon2__parallelism=getattr(settings_lib, "argon2_parallelism", ARGON2_PARALLELISM),
+    bcrypt__rounds=getattr(settings_lib, "bcrypt_rounds", BCRYPT_ROUNDS),
+)
+
+_SECRET = settings_lib.secret_key
+_ALG = settings_lib.token_algorithm
+_ALGS = [_ALG]
+_EXP_DELTA = timedelta(minutes=settings_lib.access_token_expire_minutes)
+
+TOKEN_CACHE_TTL_SECS = 5
+_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=TOKEN_CACHE_TTL_SECS)
+_token_cache_lock = threading.Lock()
 
 
 def get_random_string() -> str:
@@ -23,29 +53,67 @@ def verify_hash(hash_value: str, plain_value: str):
     return pwd_context.verify(plain_value, hash_value)
 
 
-def create_access_token(data: dict) -> str:
+async def get_string_hash_async(value: str) -> str:
+    """Hashes a value on a worker thread so the event loop is not blocked
+    for the duration of the hash
+
+    Args:
+        value (str): plain value to hash
+
+    Returns:
+        str: hash of value
+    """
+    return await anyio.to_thread.run_sync(pwd_context.hash, value)
+
+
+async def verify_hash_async(hash_value: str, plain_value: str) -> bool:
+    """Verifies a value against its hash on a worker thread so the event
+    loop is not blocked for the duration of the check
+
+    Args:
+        hash_value (str): stored hash
+        plain_value (str): plain value to verify
+
+    Returns:
+        bool: True when plain_value matches hash_value
+    """
+    return await anyio.to_thread.run_sync(pwd_context.verify, plain_value, hash_value)
+
+
+def hash_needs_update(hash_value: str) -> bool:
+    """Checks if a stored hash uses a deprecated scheme or outdated cost
+    settings and should be replaced by a fresh hash on next login
+
+    Args:
+        hash_value (str): stored hash
+
+    Returns:
+        bool: True when the hash should be regenerated
+    """
+    return pwd_context.needs_update(hash_value)
+
+
+def create_access_token(**data) -> str:
     """Generates JWT
 
     Args:
-        data (dict): data to be encoded
+        data (dict): claims to be encoded, passed as keyword arguments
 
     Returns:
         str: encoded token
     """
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(
-        minutes=settings_lib.access_token_expire_minutes
-    )
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(
-        to_encode, settings_lib.secret_key, algorithm=settings_lib.token_algorithm
-    )
+    data["exp"] = datetime.utcnow() + _EXP_DELTA
+    encoded_jwt = jwt.encode(data, _SECRET, algorithm=_ALG)
     return encoded_jwt
 
 
 def decode_access_token(token: str) -> dict:
     """decodes jwt access token
 
+    Successfully decoded tokens are cached for a few seconds, keyed by
+    the token's sha256 digest and never past the token's own expiry, so
+    repeated requests with the same token skip signature verification.
+
     Args:
         token (str): Token
 
@@ -55,10 +123,19 @@ def decode_access_token(token: str) -> dict:
     Raises:
         ForbiddenException: when jwt cannot be decoded
     """
+    key = sha256(token.encode()).digest()
+    now = time.time()
+    with _token_cache_lock:
+        cached = _token_cache.get(key)
+    if cached is not None and cached[1] > now:
+        return cached[0].copy()
     try:
-        payload = jwt.decode(
-            token, settings_lib.secret_key, algorithms=[settings_lib.token_algorithm]
-        )
-        return payload
+        payload = jwt.decode(token, _SECRET, algorithms=_ALGS)
     except JWTError as e:
         raise exceptions.ForbiddenException(str(e))
+    cache_until = now + TOKEN_CACHE_TTL_SECS
+    expiry = min(payload.get("exp", cache_until), cache_until)
+    if expiry > now:
+        with _token_cache_lock:
+            _token_cache[key] = (payload.copy(), expiry)
+    return payload
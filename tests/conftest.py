@@ -0,0 +1,50 @@
+"""Stands in for the application modules `src.utils` imports, `src.config`
+and `src.libs`, which host applications provide and this tree does not.
+The stubs are only installed when those packages are missing, before any
+test module imports `src`.
+"""
+import sys
+import types
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+class Settings:
+    secret_key = "test-secret"
+    token_algorithm = "HS256"
+    access_token_expire_minutes = 30
+    hash_scheme = "bcrypt"
+    # low costs keep hashing fast under test
+    argon2_time_cost = 1
+    argon2_memory_cost = 1024
+    argon2_parallelism = 1
+    bcrypt_rounds = 4
+
+
+class ForbiddenException(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+def _install(name: str, **attributes) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules[name] = module
+    return module
+
+
+if not (SRC_DIR / "config").exists():
+    _install(
+        "src.config",
+        settings=_install("src.config.settings", Settings=Settings),
+    )
+
+if not (SRC_DIR / "libs").exists():
+    _install(
+        "src.libs",
+        exceptions=_install(
+            "src.libs.exceptions", ForbiddenException=ForbiddenException
+        ),
+    )
@@ -0,0 +1,43 @@
+import asyncio
+
+import orjson
+import pytest
+
+from src.exceptions import (
+    BadRequest,
+    BaseHTTPException,
+    ForbiddenException,
+    InternalServerException,
+    NotFoundException,
+    UnauthorizedException,
+    base_http_exception_handler,
+)
+
+
+@pytest.mark.parametrize(
+    "klass, status_code",
+    [
+        (NotFoundException, 404),
+        (InternalServerException, 500),
+        (BadRequest, 400),
+        (ForbiddenException, 403),
+        (UnauthorizedException, 401),
+    ],
+)
+def test_exceptions_carry_message_and_status(klass, status_code):
+    exc = klass("failed")
+    assert isinstance(exc, BaseHTTPException)
+    assert exc.status_code == status_code
+    assert exc.message == str(exc) == "failed"
+
+
+def test_status_code_can_be_overridden():
+    exc = BadRequest("conflict", status_code=409)
+    assert exc.status_code == 409
+    assert BadRequest("failed").status_code == 400
+
+
+def test_handler_renders_message_and_status():
+    response = asyncio.run(base_http_exception_handler(None, NotFoundException("gone")))
+    assert response.status_code == 404
+    assert orjson.loads(response.body) == {"message": "gone"}
@@ -0,0 +1,26 @@
+import pytest
+from bson import ObjectId
+from pydantic import BaseModel, ValidationError
+
+from src.fields import PyObjectId
+
+
+class Owner(BaseModel):
+    id: PyObjectId
+
+
+def test_validate_returns_object_ids_unchanged():
+    id_ = ObjectId()
+    assert PyObjectId.validate(id_) is id_
+
+
+def test_validate_converts_strings():
+    id_ = ObjectId()
+    assert PyObjectId.validate(str(id_)) == id_
+
+
+def test_validate_rejects_invalid_values():
+    with pytest.raises(ValueError):
+        PyObjectId.validate("not-an-object-id")
+    with pytest.raises(ValidationError):
+        Owner(id="not-an-object-id")
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+from gridfs import errors as gridfs_errors
+
+from src.exceptions import NotFoundException
+from src.file_storage import FileSystem
+
+
+class FakeGridOut:
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    async def readchunk(self):
+        return self.chunks.pop(0) if self.chunks else b""
+
+
+class FakeBucket:
+    def __init__(self, files):
+        self.files = files
+
+    async def open_download_stream(self, file_id):
+        if file_id not in self.files:
+            raise gridfs_errors.NoFile(file_id)
+        return FakeGridOut(self.files[file_id])
+
+
+def make_file_system(files):
+    file_system = FileSystem.__new__(FileSystem)
+    file_system.fs = FakeBucket(files)
+    return file_system
+
+
+def test_download_stream_yields_chunks():
+    file_id = ObjectId()
+    file_system = make_file_system({file_id: [b"ab", b"cd"]})
+
+    async def read():
+        return [chunk async for chunk in await file_system.download_stream(file_id)]
+
+    assert asyncio.run(read()) == [b"ab", b"cd"]
+
+
+def test_download_stream_raises_before_iteration_for_missing_files():
+    file_system = make_file_system({})
+    with pytest.raises(NotFoundException):
+        asyncio.run(file_system.download_stream(ObjectId()))
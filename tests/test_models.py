@@ -0,0 +1,20 @@
+import time
+
+import pytest
+
+from src.models import ErrorModel, ErrorModelStatus, PaginationModel
+
+
+@pytest.mark.parametrize(
+    "total_count, size, total_pages",
+    [(0, 10, 0), (1, 10, 1), (10, 10, 1), (11, 10, 2), (25, 5, 5), (26, 5, 6)],
+)
+def test_total_pages_rounds_up(total_count, size, total_pages):
+    pagination = PaginationModel(total_count=total_count, page=1, size=size, data=[])
+    assert pagination.total_pages == total_pages
+
+
+def test_error_timestamp_is_taken_per_instance():
+    before = time.time()
+    error = ErrorModel(status=ErrorModelStatus.FAILED, message="failed", details="")
+    assert before <= error.timestamp <= time.time()
@@ -0,0 +1,61 @@
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference
+
+from src.models import DbModel
+from src.repository import BaseRepository, _fast_build, _merge_expression
+
+
+class Account(DbModel):
+    email: str
+
+
+class AccountRepository(BaseRepository):
+    model_klass = Account
+    collection_name = "accounts"
+
+
+def test_collection_handles_are_cached_per_database_object():
+    client = AsyncIOMotorClient("mongodb://localhost:1", connect=False)
+    database = client["test"]
+    secondary = client.get_database("test", read_preference=ReadPreference.SECONDARY)
+    collection = AccountRepository(database).collection
+    assert AccountRepository(database).collection is collection
+    assert AccountRepository(secondary).collection is not collection
+    assert (
+        AccountRepository(secondary).collection.read_preference
+        == ReadPreference.SECONDARY
+    )
+
+
+def test_fast_build_maps_aliases_to_field_names():
+    id_ = ObjectId()
+    account = _fast_build(Account, {"_id": id_, "email": "a@b.c", "extra": 1})
+    assert account.id == id_
+    assert account.email == "a@b.c"
+    assert "_id" not in account.__dict__
+    assert "extra" not in account.__dict__
+
+
+def test_fast_build_accepts_field_names_without_validating():
+    account = _fast_build(Account, {"id": "raw", "email": 1})
+    assert account.id == "raw"
+    assert account.email == 1
+
+
+def test_merge_expression_expands_dotted_keys():
+    expression = _merge_expression("$$item", {"name": "$x", "address.city": "Ikeja"})
+    assert expression == {
+        "$mergeObjects": [
+            "$$item",
+            {
+                "name": {"$literal": "$x"},
+                "address": {
+                    "$mergeObjects": [
+                        "$$item.address",
+                        {"city": {"$literal": "Ikeja"}},
+                    ]
+                },
+            },
+        ]
+    }
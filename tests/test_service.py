@@ -0,0 +1,239 @@
+import asyncio
+import types
+from typing import Optional
+
+import orjson
+import pytest
+from bson import ObjectId
+from pydantic import BaseModel, Field, ValidationError
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from src.exceptions import BadRequest, NotFoundException
+from src.fields import PyObjectId
+from src.models import DbModel, MongoModelConfig
+from src.service import BaseService
+
+
+class Item(DbModel):
+    name: str
+
+
+class ItemResponse(BaseModel):
+    id: PyObjectId = Field(alias="_id")
+    name: str
+
+    Config = MongoModelConfig
+
+
+class FakeRepository:
+    def __init__(self, database):
+        self.entities = []
+        self.deleted = []
+        self.updates = []
+        self.indexed = []
+        self.index_attempts = 0
+        self.index_error = None
+        self.conflicts = []
+        self.update_error = None
+        self.delete_result = True
+
+    async def list(self, size, page, projection=None, **filter_kwargs):
+        return len(self.entities), self.entities
+
+    async def ensure_unique_indexes(self, fields):
+        self.index_attempts += 1
+        await asyncio.sleep(0)
+        if self.index_error:
+            raise self.index_error
+        self.indexed.append(fields)
+
+    async def search_any(self, fields, limit=1, exclude_id=None):
+        return self.conflicts if fields else []
+
+    async def create(self, model_instance):
+        self.entities.append(model_instance)
+        return model_instance
+
+    async def update_and_return(self, id_, set_dict, projection=None):
+        if self.update_error:
+            raise self.update_error
+        self.updates.append(set_dict)
+        return self.entities[0]
+
+    async def delete(self, id_):
+        self.deleted.append(id_)
+        return self.delete_result
+
+
+class FakeService(BaseService):
+    repository_klass = FakeRepository
+    model_klass = Item
+    data_response_klass = ItemResponse
+
+
+class FakeClient:
+    pass
+
+
+def make_service(klass=FakeService):
+    database = types.SimpleNamespace(client=FakeClient(), name="test")
+    return klass(database)
+
+
+def test_delete_removes_entity():
+    service = make_service()
+    id_ = ObjectId()
+    assert asyncio.run(service.delete(id_)) is None
+    assert service.repository.deleted == [id_]
+
+
+def test_delete_missing_entity_raises_not_found():
+    service = make_service()
+    service.repository.delete_result = False
+    with pytest.raises(NotFoundException):
+        asyncio.run(service.delete(ObjectId()))
+    assert len(service.repository.deleted) == 1
+
+
+class UnsharedService(FakeService):
+    shared_schema = False
+
+
+@pytest.mark.parametrize("klass", [FakeService, UnsharedService])
+def test_list_json_keys_rows_by_alias(klass):
+    service = make_service(klass)
+    item = Item(name="first")
+    service.repository.entities = [item]
+    payload = orjson.loads(asyncio.run(service.list_json(size=None, page=None)))
+    assert payload == {
+        "total_count": 1,
+        "data": [{"_id": str(item.id), "name": "first"}],
+    }
+
+
+class Task(DbModel):
+    owner_id: PyObjectId
+    title: str
+
+
+class TaskCreate(BaseModel):
+    owner_id: str
+    title: str
+
+
+class TaskUpdate(BaseModel):
+    owner_id: Optional[str]
+    title: Optional[str]
+
+
+class TaskService(BaseService):
+    repository_klass = FakeRepository
+    model_klass = Task
+    data_response_klass = Task
+
+
+class UnsharedTaskService(TaskService):
+    shared_schema = False
+
+
+@pytest.mark.parametrize("klass", [TaskService, UnsharedTaskService])
+def test_create_validates_requests_against_entity(klass):
+    service = make_service(klass)
+    owner_id = ObjectId()
+    asyncio.run(service.create(TaskCreate(owner_id=str(owner_id), title="first")))
+    assert service.repository.entities[0].owner_id == owner_id
+    assert isinstance(service.repository.entities[0].owner_id, ObjectId)
+
+
+@pytest.mark.parametrize("klass", [TaskService, UnsharedTaskService])
+def test_create_rejects_invalid_requests(klass):
+    service = make_service(klass)
+    with pytest.raises(ValidationError):
+        asyncio.run(service.create(TaskCreate(owner_id="not-an-id", title="first")))
+    assert service.repository.entities == []
+
+
+@pytest.mark.parametrize("klass", [TaskService, UnsharedTaskService])
+def test_update_coerces_values_to_entity_types(klass):
+    service = make_service(klass)
+    owner_id = ObjectId()
+    service.repository.entities = [Task(owner_id=owner_id, title="first")]
+    asyncio.run(service.update(ObjectId(), TaskUpdate(owner_id=str(owner_id))))
+    assert service.repository.updates == [{"owner_id": owner_id}]
+    assert isinstance(service.repository.updates[0]["owner_id"], ObjectId)
+
+
+@pytest.mark.parametrize("klass", [TaskService, UnsharedTaskService])
+def test_update_rejects_invalid_values(klass):
+    service = make_service(klass)
+    with pytest.raises(ValidationError):
+        asyncio.run(service.update(ObjectId(), TaskUpdate(owner_id="not-an-id")))
+    assert service.repository.updates == []
+
+
+class UniqueItemService(FakeService):
+    data_request_klass = Item
+    unique_fields = ["name"]
+
+
+class ItemUpdate(BaseModel):
+    name: Optional[str]
+
+
+def test_unique_indexes_are_created_once_on_first_create():
+    service = make_service(UniqueItemService)
+    asyncio.run(service.create(Item(name="first")))
+    asyncio.run(service.create(Item(name="second")))
+    assert service.repository.indexed == [("name",)]
+    assert len(service.repository.entities) == 2
+
+
+def test_concurrent_first_creates_share_one_index_build():
+    service = make_service(UniqueItemService)
+
+    async def create_many():
+        await asyncio.gather(*(service.create(Item(name=str(i))) for i in range(3)))
+
+    asyncio.run(create_many())
+    assert service.repository.index_attempts == 1
+    assert len(service.repository.entities) == 3
+
+
+def test_create_falls_back_to_query_when_indexes_fail():
+    service = make_service(UniqueItemService)
+    service.repository.index_error = OperationFailure("duplicates exist")
+    service.repository.conflicts = [ObjectId()]
+    with pytest.raises(BadRequest):
+        asyncio.run(service.create(Item(name="first")))
+    assert service.repository.entities == []
+    service.repository.conflicts = []
+    asyncio.run(service.create(Item(name="second")))
+    assert len(service.repository.entities) == 1
+    assert service.repository.index_attempts == 1
+
+
+def test_transient_index_errors_are_retried():
+    service = make_service(UniqueItemService)
+    service.repository.index_error = ConnectionError("connection lost")
+    with pytest.raises(ConnectionError):
+        asyncio.run(service.create(Item(name="first")))
+    service.repository.index_error = None
+    asyncio.run(service.create(Item(name="first")))
+    assert service.repository.index_attempts == 2
+    assert service.repository.indexed == [("name",)]
+
+
+def test_update_translates_duplicate_key_errors():
+    service = make_service(UniqueItemService)
+    service.repository.update_error = DuplicateKeyError(
+        "E11000", 11000, {"keyPattern": {"name": 1}}
+    )
+    with pytest.raises(BadRequest, match="name"):
+        asyncio.run(service.update(ObjectId(), ItemUpdate(name="taken")))
+
+
+def test_unique_fields_may_be_none():
+    class NoUniqueService(FakeService):
+        unique_fields = None
+
+    assert NoUniqueService._unique_keys == ()
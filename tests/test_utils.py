@@ -0,0 +1,86 @@
+import time
+import types
+
+import jwt
+import pytest
+
+from src import utils
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    utils._token_cache.clear()
+    yield
+    utils._token_cache.clear()
+
+
+@pytest.fixture
+def decode_calls(monkeypatch):
+    calls = []
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(utils.jwt, "decode", counting_decode)
+    return calls
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # starts at the real time so tokens stay valid for jwt, while the
+    # cache sees the advanced time
+    clock = types.SimpleNamespace(now=time.time())
+    monkeypatch.setattr(utils, "time", types.SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def encode(**claims) -> str:
+    return jwt.encode(claims, utils._SECRET, algorithm=utils._ALG)
+
+
+def test_cache_hit_skips_decoding(decode_calls):
+    token = utils.create_access_token(sub="user")
+    first = utils.decode_access_token(token)
+    second = utils.decode_access_token(token)
+    assert first == second
+    assert first["sub"] == "user"
+    assert len(decode_calls) == 1
+
+
+def test_invalid_tokens_are_never_cached(decode_calls):
+    for _ in range(2):
+        with pytest.raises(utils.exceptions.ForbiddenException):
+            utils.decode_access_token("not-a-token")
+    assert len(decode_calls) == 2
+    assert len(utils._token_cache) == 0
+
+
+def test_entries_expire_after_cache_ttl(decode_calls, clock):
+    token = encode(sub="user", exp=int(clock.now) + 3600)
+    utils.decode_access_token(token)
+    clock.now += utils.TOKEN_CACHE_TTL_SECS - 1
+    utils.decode_access_token(token)
+    assert len(decode_calls) == 1
+    clock.now += 2
+    utils.decode_access_token(token)
+    assert len(decode_calls) == 2
+
+
+def test_entries_expire_with_the_token(decode_calls, clock):
+    exp = int(clock.now) + 2
+    token = encode(sub="user", exp=exp)
+    utils.decode_access_token(token)
+    clock.now = exp + 0.5
+    utils.decode_access_token(token)
+    assert len(decode_calls) == 2
+
+
+def test_callers_get_copies():
+    token = utils.create_access_token(sub="user")
+    first = utils.decode_access_token(token)
+    first["sub"] = "changed"
+    second = utils.decode_access_token(token)
+    second["sub"] = "changed again"
+    assert utils.decode_access_token(token)["sub"] == "user"